@@ -5,54 +5,365 @@ Valorant MCP Server - Streamlined Version
 A lean Model Context Protocol (MCP) server providing essential Valorant data access.
 Focuses on data retrieval; lets LLM handle analysis and orchestration.
 
-Total Tools: 12 (down from 19)
+Total Tools: 14 (down from 19)
 """
 
 import os
+import random
+import asyncio
 import logging
-import requests
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, get_args
+from urllib.parse import quote as _urlquote
 
-from fastmcp import FastMCP
-from dotenv import load_dotenv
+import httpx
+import orjson
+from aiolimiter import AsyncLimiter
+from cachetools import Cache, LRUCache, TTLCache
+from fastmcp import Context, FastMCP
 
 # Configure logging (default to INFO; can be overridden in main via LOG_LEVEL)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastMCP server
-mcp = FastMCP("Valorant MCP Server")
-
 # Global API key
 api_key = None
 
-def make_api_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
+# Shared read-only fallback for missing nested objects; never mutate it
+_EMPTY: Dict[str, Any] = {}
+
+# Shared async HTTP client, created lazily on first request so keep-alive
+# connections to the API host are reused across tool calls; HTTP/2 lets
+# concurrent requests share one connection
+_client: Optional[httpx.AsyncClient] = None
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url="https://api.henrikdev.xyz",
+            headers={'accept': 'application/json', 'Accept-Encoding': 'gzip, deflate, br'},
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60),
+            timeout=10,
+            http2=True,
+        )
+    return _client
+
+async def close_client() -> None:
+    """Close the shared HTTP client if it was opened"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP):
+    """Release pooled connections when the server shuts down"""
+    try:
+        yield
+    finally:
+        await close_client()
+
+# Client-side throttling to stay under the HenrikDev per-key rate limit
+RATE_LIMIT_PER_MINUTE = 30
+_rate_limiter = AsyncLimiter(max_rate=RATE_LIMIT_PER_MINUTE, time_period=60)
+
+# Cap on simultaneous in-flight requests; the limiter above caps the rate
+_inflight = asyncio.Semaphore(16)
+
+# Retry policy for rate-limited (429) and transient server (5xx) responses,
+# plus connection failures and timeouts
+MAX_RETRIES = 3
+MAX_RETRY_DELAY = 30.0
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff (1s, 2s, 4s, ...) with jitter so retries don't arrive in lockstep"""
+    return min(2 ** attempt + random.uniform(0, 1), MAX_RETRY_DELAY)
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying, preferring the server's own hint"""
+    # X-RateLimit-Reset is when the quota window resets, which only says
+    # anything about when to retry a rate-limited (429) response
+    headers = ("Retry-After", "X-RateLimit-Reset") if response.status_code == 429 else ("Retry-After",)
+    for header in headers:
+        value = response.headers.get(header)
+        if value:
+            try:
+                return min(max(float(value), 0.0), MAX_RETRY_DELAY)
+            except ValueError:
+                pass
+    return _backoff(attempt)
+
+# Initialize FastMCP server
+mcp = FastMCP("Valorant MCP Server", lifespan=_lifespan)
+
+async def make_api_request(endpoint: str, params: Dict = None) -> Dict[str, Any]:
     """Make a direct HTTP request to the HenrikDev API"""
     if not api_key:
         return {"error": "Valorant API not initialized. Please set API key first."}
     
-    url = f"https://api.henrikdev.xyz{endpoint}"
-    headers = {
-        'accept': 'application/json',
-        'Authorization': api_key
-    }
-    
     try:
-        response = requests.get(url, headers=headers, params=params)
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with _rate_limiter, _inflight:
+                    response = await _get_client().get(endpoint, headers={'Authorization': api_key}, params=params)
+            except httpx.TransportError as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = _backoff(attempt)
+                logger.warning(f"{type(e).__name__} for {endpoint}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            
+            if response.status_code not in _RETRYABLE_STATUS or attempt == MAX_RETRIES:
+                break
+            
+            delay = _retry_delay(response, attempt)
+            logger.warning(f"HTTP {response.status_code} for {endpoint}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
         
         if response.status_code == 200:
-            return response.json()
+            return orjson.loads(response.content)
         elif response.status_code == 401:
             return {"error": "API error: Unauthorized - Invalid API key"}
         elif response.status_code == 404:
             return {"error": "API error: Player not found"}
+        elif response.status_code == 429:
+            return {"error": "API error: Rate limit exceeded - try again later"}
         else:
             return {"error": f"API error: HTTP {response.status_code} - {response.text}"}
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {"error": f"Network error: {str(e)}"}
-    except Exception as e:
-        return {"error": f"Unexpected error: {str(e)}"}
+    except ValueError as e:
+        return {"error": f"Invalid API response: {str(e)}"}
+
+# Response caches for idempotent endpoints: content only changes on patch days,
+# leaderboard and status on a minute scale
+_content_cache: TTLCache = TTLCache(maxsize=64, ttl=3600)
+_leaderboard_cache: TTLCache = TTLCache(maxsize=32, ttl=300)
+_status_cache: TTLCache = TTLCache(maxsize=64, ttl=60)
+
+# Finished matches never change, so their details are kept until evicted;
+# entries are trimmed to what the match tools read (see _trim_match)
+_match_cache: LRUCache = LRUCache(maxsize=4096)
+MATCH_PATH = "/valorant/v2/match/"
+
+# Riot ID -> row index for cached leaderboards, stored with the players list it indexes
+_leaderboard_index_cache: TTLCache = TTLCache(maxsize=32, ttl=300)
+
+def _leaderboard_index(key: Tuple[str, str], players: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    """Map lower-cased (game_name, tag_line) to row index, reusing the index while the payload is cached"""
+    cached = _leaderboard_index_cache.get(key)
+    if cached is not None and cached[0] is players:
+        return cached[1]
+    
+    index = {}
+    for i, p in enumerate(players):
+        index.setdefault(((p.get("game_name") or "").lower(), (p.get("tag_line") or "").lower()), i)
+    _leaderboard_index_cache[key] = (players, index)
+    return index
+
+# In-flight fetches per cache key, so concurrent misses for the same request
+# await one fetch and share its result, errors included
+_pending_fetches: Dict[Any, "asyncio.Task[Dict[str, Any]]"] = {}
+
+async def _fetch_into_cache(cache: Cache, key: Any, endpoint: str, params: Optional[Dict],
+                            transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]) -> Dict[str, Any]:
+    """Fetch a response and cache it if successful, then retire the in-flight entry"""
+    try:
+        response = await make_api_request(endpoint, params)
+        if "error" not in response:
+            if transform is not None:
+                response = transform(response)
+            cache[key] = response
+        return response
+    finally:
+        _pending_fetches.pop(key, None)
+
+def _cache_key(endpoint: str, params: Optional[Dict]) -> Tuple[str, Tuple]:
+    """Cache key for a request: the endpoint plus its params in a stable order"""
+    return endpoint, tuple(sorted((params or {}).items()))
+
+async def cached_api_request(cache: Cache, endpoint: str, params: Dict = None,
+                             transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    make_api_request with successful responses served from cache until they expire or are evicted.
+    
+    If given, transform is applied to a successful response before it is cached and returned.
+    """
+    key = _cache_key(endpoint, params)
+    response = cache.get(key)
+    if response is not None:
+        return response
+    
+    task = _pending_fetches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_into_cache(cache, key, endpoint, params, transform))
+        _pending_fetches[key] = task
+    # Shield so one cancelled caller does not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+def _riot_id_path(name: str, tag: str) -> str:
+    """Percent-encode a Riot ID as "name/tag" URL path segments"""
+    return f"{_urlquote(name, safe='')}/{_urlquote(tag, safe='')}"
+
+# PUUIDs never change for a Riot ID, so resolved lookups are kept for hours
+PUUID_CACHE_TTL = 6 * 60 * 60
+_puuid_cache: TTLCache = TTLCache(maxsize=4096, ttl=PUUID_CACHE_TTL)
+
+def _cached_puuid(name: str, tag: str) -> Optional[str]:
+    """Return the cached PUUID for a Riot ID, if still fresh"""
+    return _puuid_cache.get((name.lower(), tag.lower()))
+
+def _remember_puuid(name: str, tag: str, puuid: str) -> None:
+    """Cache a resolved PUUID for a Riot ID"""
+    _puuid_cache[(name.lower(), tag.lower())] = puuid
+
+def _find_player(all_players: List[Dict[str, Any]], puuid: Optional[str], name: str, tag: str) -> Optional[Dict[str, Any]]:
+    """Find a player in a match roster by PUUID, or by case-insensitive Riot ID when the PUUID is unknown"""
+    if puuid:
+        return next((p for p in all_players if p.get("puuid") == puuid), None)
+    name, tag = name.lower(), tag.lower()
+    return next(
+        (p for p in all_players if (p.get("name") or "").lower() == name and (p.get("tag") or "").lower() == tag),
+        None
+    )
+
+def _find_puuid_in_matches(matches: List[Dict[str, Any]], name: str, tag: str) -> Optional[str]:
+    """Find a player's PUUID by Riot ID in the rosters of the given matches"""
+    for match in matches:
+        player = _find_player((match.get("players") or _EMPTY).get("all_players", []), None, name, tag)
+        if player:
+            return player.get("puuid")
+    return None
+
+async def resolve_puuid(name: str, tag: str) -> Dict[str, Any]:
+    """Look up a player's PUUID, skipping the account request on a cache hit"""
+    puuid = _cached_puuid(name, tag)
+    if puuid:
+        return {"puuid": puuid}
+    
+    response = await make_api_request(f"/valorant/v1/account/{_riot_id_path(name, tag)}")
+    if "error" in response:
+        return response
+    
+    puuid = (response.get("data") or _EMPTY).get("puuid")
+    if not puuid:
+        return {"error": "Could not retrieve player PUUID"}
+    
+    _remember_puuid(name, tag, puuid)
+    return {"puuid": puuid}
+
+# Regions accepted by the HenrikDev API and the largest page it returns
+_VALID_REGIONS = frozenset({"ap", "na", "eu", "kr", "br", "latam"})
+MAX_PAGE_SIZE = 20
+
+def _validate_args(region: str, size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Return an error dict for arguments the API would reject, so no request is wasted"""
+    if region not in _VALID_REGIONS:
+        return {"error": f"Invalid region: {region}. Must be one of: {', '.join(sorted(_VALID_REGIONS))}"}
+    if size is not None and not 1 <= size <= MAX_PAGE_SIZE:
+        return {"error": f"Invalid size: {size}. Must be between 1 and {MAX_PAGE_SIZE}"}
+    return None
+
+# Static response schemas: source keys copied verbatim into tool responses
+_CARD_KEYS = ("id", "small", "large", "wide")
+_CONTENT_ENTITY_KEYS = ("uuid", "display_name", "description", "display_icon")
+_MAP_KEYS = ("uuid", "display_name", "coordinates", "display_icon")
+_MATCH_PLAYER_KEYS = ("puuid", "name", "tag", "team", "character")
+_CACHED_MATCH_PLAYER_KEYS = _MATCH_PLAYER_KEYS + ("stats",)
+
+def _project(src: Dict[str, Any], keys: Tuple[str, ...]) -> Dict[str, Any]:
+    """Copy the given keys out of src, with None for any that are missing"""
+    return dict(zip(keys, map(src.get, keys)))
+
+def _trim_match(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a match response to the metadata and per-player fields the match tools read"""
+    data = response.get("data") or _EMPTY
+    all_players = (data.get("players") or _EMPTY).get("all_players", [])
+    return {
+        "data": {
+            "match_id": data.get("match_id"),
+            "metadata": data.get("metadata"),
+            "players": {"all_players": [_project(p, _CACHED_MATCH_PLAYER_KEYS) for p in all_players]}
+        }
+    }
+
+def _match_endpoint(match_id: str) -> str:
+    """Match details endpoint for a match ID"""
+    # Encode the caller-supplied ID so it stays one path segment and cannot
+    # reach (and be cached as) another endpoint
+    return MATCH_PATH + _urlquote(match_id, safe='')
+
+def _match_is_cached(match_id: str) -> bool:
+    """Whether a match's details would be served from the match cache"""
+    return _cache_key(_match_endpoint(match_id), None) in _match_cache
+
+async def _fetch_match(match_id: str) -> Dict[str, Any]:
+    """Fetch a match through the match cache, trimmed by _trim_match"""
+    return await cached_api_request(_match_cache, _match_endpoint(match_id), transform=_trim_match)
+
+# Slotted records for the repeated entries in list-heavy responses; FastMCP
+# serializes dataclasses as plain JSON objects
+@dataclass(slots=True)
+class PlayerStats:
+    kills: Optional[int] = None
+    deaths: Optional[int] = None
+    assists: Optional[int] = None
+    score: Optional[int] = None
+
+@dataclass(slots=True)
+class LeaderboardEntry:
+    puuid: Optional[str] = None
+    game_name: Optional[str] = None
+    tag_line: Optional[str] = None
+    leaderboard_rank: Optional[int] = None
+    ranked_rating: Optional[int] = None
+    number_of_wins: Optional[int] = None
+    competitive_tier: Optional[int] = None
+
+@dataclass(slots=True)
+class MatchInfo:
+    match_id: Optional[str] = None
+    map: Optional[str] = None
+    mode: Optional[str] = None
+    started_at: Optional[str] = None
+    season_id: Optional[str] = None
+    region: Optional[str] = None
+    cluster: Optional[str] = None
+    # Player-specific fields, left as None if the player is not in the roster
+    character: Optional[str] = None
+    team: Optional[str] = None
+    kills: Optional[int] = None
+    deaths: Optional[int] = None
+    assists: Optional[int] = None
+    score: Optional[int] = None
+    tier: Optional[str] = None
+
+@dataclass(slots=True)
+class MMRHistoryEntry:
+    match_id: Optional[str] = None
+    map: Optional[str] = None
+    map_id: Optional[str] = None
+    current_tier: Optional[int] = None
+    current_tier_patched: Optional[str] = None
+    ranking_in_tier: Optional[int] = None
+    mmr_change_to_last_game: Optional[int] = None
+    elo: Optional[int] = None
+    season_id: Optional[str] = None
+    date: Optional[str] = None
+    date_raw: Optional[int] = None
+    images: Optional[Dict[str, Any]] = None
+
+# Source keys for the records built straight from API objects, derived from
+# their fields so the two cannot drift apart
+_PLAYER_STATS_KEYS = tuple(f.name for f in fields(PlayerStats))
+_LEADERBOARD_PLAYER_KEYS = tuple(f.name for f in fields(LeaderboardEntry))
 
 # ============================================================================
 # CORE DATA RETRIEVAL TOOLS (10 tools)
@@ -73,31 +384,22 @@ async def get_account_details(name: str, tag: str, region: str = "na") -> Dict[s
     Returns:
         PUUID, account level, player card, region info
     """
-    try:
-        endpoint = f"/valorant/v1/account/{name}/{tag}"
-        response = make_api_request(endpoint)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        return {
-            "puuid": data.get("puuid"),
-            "name": data.get("name"),
-            "tag": data.get("tag"),
-            "card": {
-                "id": data.get("card", {}).get("id"),
-                "small": data.get("card", {}).get("small"),
-                "large": data.get("card", {}).get("large"),
-                "wide": data.get("card", {}).get("wide")
-            },
-            "region": data.get("region"),
-            "account_level": data.get("account_level"),
-            "last_update": data.get("last_update")
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    endpoint = f"/valorant/v1/account/{_riot_id_path(name, tag)}"
+    response = await make_api_request(endpoint)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    return {
+        "puuid": data.get("puuid"),
+        "name": data.get("name"),
+        "tag": data.get("tag"),
+        "card": _project(data.get("card") or _EMPTY, _CARD_KEYS),
+        "region": data.get("region"),
+        "account_level": data.get("account_level"),
+        "last_update": data.get("last_update")
+    }
 
 @mcp.tool()
 async def get_match_history_by_name(name: str, tag: str, region: str = "na", size: int = 10) -> Dict[str, Any]:
@@ -115,73 +417,100 @@ async def get_match_history_by_name(name: str, tag: str, region: str = "na", siz
     Returns:
         List of matches with kills, deaths, assists, agents, maps, scores
     """
-    try:
-        # Get PUUID
-        account_endpoint = f"/valorant/v1/account/{name}/{tag}"
-        account_response = make_api_request(account_endpoint)
-        
-        if "error" in account_response:
-            return account_response
-        
-        puuid = account_response.get("data", {}).get("puuid")
-        if not puuid:
-            return {"error": "Could not retrieve player PUUID"}
-        
-        # Get matches
-        endpoint = f"/valorant/v3/by-puuid/matches/{region}/{puuid}"
-        response = make_api_request(endpoint, {"size": size})
+    region = region.lower()
+    error = _validate_args(region, size)
+    if error:
+        return error
+    
+    # The by-name endpoint resolves the player server-side, so no account lookup is needed
+    endpoint = f"/valorant/v3/matches/{region}/{_riot_id_path(name, tag)}"
+    response = await make_api_request(endpoint, {"size": size})
+    
+    if "error" in response:
+        return response
+    
+    matches = response.get("data", [])
+    
+    # Identify the player by PUUID; fall back to the account endpoint only
+    # if the Riot ID is not found in any returned roster
+    puuid = _cached_puuid(name, tag)
+    if not puuid:
+        puuid = _find_puuid_in_matches(matches, name, tag)
+        if puuid:
+            _remember_puuid(name, tag, puuid)
+        elif matches:
+            puuid_response = await resolve_puuid(name, tag)
+            
+            if "error" in puuid_response:
+                return puuid_response
+            
+            puuid = puuid_response["puuid"]
+    
+    match_list = []
+    
+    for match in matches:
+        metadata = match.get("metadata") or _EMPTY
+        all_players = (match.get("players") or _EMPTY).get("all_players", [])
         
-        if "error" in response:
-            return response
+        # Find player data
+        player_data = next((p for p in all_players if p.get("puuid") == puuid), None)
         
-        matches = response.get("data", [])
-        match_list = []
+        match_info = MatchInfo(
+            match_id=metadata.get("matchid"),
+            map=metadata.get("map"),
+            mode=metadata.get("mode"),
+            started_at=metadata.get("game_start_patched"),
+            season_id=metadata.get("season_id"),
+            region=metadata.get("region"),
+            cluster=metadata.get("cluster")
+        )
         
-        for match in matches:
-            metadata = match.get("metadata", {})
-            players = match.get("players", {})
-            all_players = players.get("all_players", [])
-            
-            # Find player data
-            player_data = None
-            for p in all_players:
-                if p.get("puuid") == puuid:
-                    player_data = p
-                    break
-            
-            match_info = {
-                "match_id": metadata.get("matchid"),
-                "map": metadata.get("map"),
-                "mode": metadata.get("mode"),
-                "started_at": metadata.get("game_start_patched"),
-                "season_id": metadata.get("season_id"),
-                "region": metadata.get("region"),
-                "cluster": metadata.get("cluster")
-            }
-            
-            if player_data:
-                stats = player_data.get("stats", {})
-                match_info.update({
-                    "character": player_data.get("character"),
-                    "team": player_data.get("team"),
-                    "kills": stats.get("kills"),
-                    "deaths": stats.get("deaths"),
-                    "assists": stats.get("assists"),
-                    "score": stats.get("score"),
-                    "tier": player_data.get("currenttier_patched")
-                })
-            
-            match_list.append(match_info)
+        if player_data:
+            stats = player_data.get("stats") or _EMPTY
+            match_info.character = player_data.get("character")
+            match_info.team = player_data.get("team")
+            match_info.kills = stats.get("kills")
+            match_info.deaths = stats.get("deaths")
+            match_info.assists = stats.get("assists")
+            match_info.score = stats.get("score")
+            match_info.tier = player_data.get("currenttier_patched")
         
-        return {
-            "player_name": f"{name}#{tag}",
-            "region": region,
-            "matches": match_list,
-            "total_matches": len(match_list)
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+        match_list.append(match_info)
+    
+    return {
+        "player_name": f"{name}#{tag}",
+        "region": region,
+        "matches": match_list,
+        "total_matches": len(match_list)
+    }
+
+async def fetch_match_details(match_id: str) -> Dict[str, Any]:
+    """Fetch and project a single match; shared by the single and batch match tools"""
+    response = await _fetch_match(match_id)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    metadata = data.get("metadata") or _EMPTY
+    
+    players = []
+    for player in (data.get("players") or _EMPTY).get("all_players", []):
+        player_info = _project(player, _MATCH_PLAYER_KEYS)
+        player_info["stats"] = PlayerStats(**_project(player.get("stats") or _EMPTY, _PLAYER_STATS_KEYS))
+        players.append(player_info)
+    
+    return {
+        "match_id": data.get("match_id"),
+        "map": metadata.get("map"),
+        "mode": metadata.get("mode"),
+        "rounds_won": metadata.get("rounds_won"),
+        "rounds_lost": metadata.get("rounds_lost"),
+        "score": metadata.get("score"),
+        "result": metadata.get("result"),
+        "date": metadata.get("game_start_patched"),
+        "players": players
+    }
 
 @mcp.tool()
 async def get_match_details(match_id: str, region: str = "na") -> Dict[str, Any]:
@@ -197,44 +526,7 @@ async def get_match_details(match_id: str, region: str = "na") -> Dict[str, Any]
     Returns:
         Match details with all players, rounds, scores
     """
-    try:
-        endpoint = f"/valorant/v2/match/{match_id}"
-        response = make_api_request(endpoint)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        metadata = data.get("metadata", {})
-        
-        return {
-            "match_id": data.get("match_id"),
-            "map": metadata.get("map"),
-            "mode": metadata.get("mode"),
-            "rounds_won": metadata.get("rounds_won"),
-            "rounds_lost": metadata.get("rounds_lost"),
-            "score": metadata.get("score"),
-            "result": metadata.get("result"),
-            "date": metadata.get("game_start_patched"),
-            "players": [
-                {
-                    "puuid": player.get("puuid"),
-                    "name": player.get("name"),
-                    "tag": player.get("tag"),
-                    "team": player.get("team"),
-                    "character": player.get("character"),
-                    "stats": {
-                        "kills": player.get("stats", {}).get("kills"),
-                        "deaths": player.get("stats", {}).get("deaths"),
-                        "assists": player.get("stats", {}).get("assists"),
-                        "score": player.get("stats", {}).get("score")
-                    }
-                } for player in data.get("players", {}).get("all_players", [])
-            ]
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    return await fetch_match_details(match_id)
 
 @mcp.tool()
 async def get_mmr_details_by_name(name: str, tag: str, region: str = "na") -> Dict[str, Any]:
@@ -251,33 +543,35 @@ async def get_mmr_details_by_name(name: str, tag: str, region: str = "na") -> Di
     Returns:
         Current rank, ELO, RR, last game MMR change
     """
-    try:
-        endpoint = f"/valorant/v2/mmr/{region}/{name}/{tag}"
-        response = make_api_request(endpoint)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        
-        return {
-            "player_name": f"{name}#{tag}",
-            "region": region,
-            "current_tier": data.get("current_tier"),
-            "current_tier_patched": data.get("current_tier_patched"),
-            "ranking_in_tier": data.get("ranking_in_tier"),
-            "mmr_change_to_last_game": data.get("mmr_change_to_last_game"),
-            "elo": data.get("elo"),
-            "games_needed_for_rating": data.get("games_needed_for_rating"),
-            "old": data.get("old"),
-            "season": {
-                "id": data.get("season", {}).get("id"),
-                "short": data.get("season", {}).get("short")
-            } if data.get("season") else None
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    region = region.lower()
+    error = _validate_args(region)
+    if error:
+        return error
+    
+    endpoint = f"/valorant/v2/mmr/{region}/{_riot_id_path(name, tag)}"
+    response = await make_api_request(endpoint)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    season = data.get("season")
+    
+    return {
+        "player_name": f"{name}#{tag}",
+        "region": region,
+        "current_tier": data.get("current_tier"),
+        "current_tier_patched": data.get("current_tier_patched"),
+        "ranking_in_tier": data.get("ranking_in_tier"),
+        "mmr_change_to_last_game": data.get("mmr_change_to_last_game"),
+        "elo": data.get("elo"),
+        "games_needed_for_rating": data.get("games_needed_for_rating"),
+        "old": data.get("old"),
+        "season": {
+            "id": season.get("id"),
+            "short": season.get("short")
+        } if season else None
+    }
 
 @mcp.tool()
 async def get_mmr_history_by_name(name: str, tag: str, region: str = "na", size: int = 10) -> Dict[str, Any]:
@@ -295,56 +589,67 @@ async def get_mmr_history_by_name(name: str, tag: str, region: str = "na", size:
     Returns:
         MMR history with match IDs, maps, rank changes, dates
     """
-    try:
-        endpoint = f"/valorant/v1/mmr-history/{region}/{name}/{tag}"
-        params = {"size": size}
-        response = make_api_request(endpoint, params)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", [])
-        history_list = []
-        ranks_seen = set()
-        
-        for mmr in data:
-            history_info = {
-                "match_id": mmr.get("match_id"),
-                "map": mmr.get("map", {}).get("name"),
-                "map_id": mmr.get("map", {}).get("id"),
-                "current_tier": mmr.get("currenttier"),
-                "current_tier_patched": mmr.get("currenttierpatched"),
-                "ranking_in_tier": mmr.get("ranking_in_tier"),
-                "mmr_change_to_last_game": mmr.get("mmr_change_to_last_game"),
-                "elo": mmr.get("elo"),
-                "season_id": mmr.get("season_id"),
-                "date": mmr.get("date"),
-                "date_raw": mmr.get("date_raw"),
-                "images": mmr.get("images", {})
-            }
-            history_list.append(history_info)
-            
-            if mmr.get("currenttierpatched"):
-                ranks_seen.add(mmr.get("currenttierpatched"))
+    region = region.lower()
+    error = _validate_args(region, size)
+    if error:
+        return error
+    
+    endpoint = f"/valorant/v1/mmr-history/{region}/{_riot_id_path(name, tag)}"
+    params = {"size": size}
+    response = await make_api_request(endpoint, params)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data", [])
+    history_list = []
+    ranks_seen = set()
+    lowest_elo = highest_elo = None
+    
+    for mmr in data:
+        elo = mmr.get("elo")
+        rank = mmr.get("currenttierpatched")
+        map_info = mmr.get("map") or _EMPTY
+        history_list.append(MMRHistoryEntry(
+            match_id=mmr.get("match_id"),
+            map=map_info.get("name"),
+            map_id=map_info.get("id"),
+            current_tier=mmr.get("currenttier"),
+            current_tier_patched=rank,
+            ranking_in_tier=mmr.get("ranking_in_tier"),
+            mmr_change_to_last_game=mmr.get("mmr_change_to_last_game"),
+            elo=elo,
+            season_id=mmr.get("season_id"),
+            date=mmr.get("date"),
+            date_raw=mmr.get("date_raw"),
+            images=mmr.get("images", {})
+        ))
         
-        rank_progression = {
-            "ranks_achieved": list(ranks_seen),
-            "highest_rank": history_list[0].get("current_tier_patched") if history_list else None,
-            "current_rank": history_list[0].get("current_tier_patched") if history_list else None,
-            "lowest_elo": min([h.get("elo", 0) for h in history_list]) if history_list else 0,
-            "highest_elo": max([h.get("elo", 0) for h in history_list]) if history_list else 0
-        }
+        if rank:
+            ranks_seen.add(rank)
         
-        return {
-            "player_name": f"{name}#{tag}",
-            "region": region,
-            "mmr_history": history_list,
-            "total_updates": len(history_list),
-            "rank_progression": rank_progression
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+        # Track the elo range in the same pass
+        if elo is not None:
+            if lowest_elo is None or elo < lowest_elo:
+                lowest_elo = elo
+            if highest_elo is None or elo > highest_elo:
+                highest_elo = elo
+    
+    rank_progression = {
+        "ranks_achieved": list(ranks_seen),
+        "highest_rank": history_list[0].current_tier_patched if history_list else None,
+        "current_rank": history_list[0].current_tier_patched if history_list else None,
+        "lowest_elo": lowest_elo if lowest_elo is not None else 0,
+        "highest_elo": highest_elo if highest_elo is not None else 0
+    }
+    
+    return {
+        "player_name": f"{name}#{tag}",
+        "region": region,
+        "mmr_history": history_list,
+        "total_updates": len(history_list),
+        "rank_progression": rank_progression
+    }
 
 @mcp.tool()
 async def get_lifetime_matches_by_name(name: str, tag: str, region: str = "na", 
@@ -367,49 +672,50 @@ async def get_lifetime_matches_by_name(name: str, tag: str, region: str = "na",
     Returns:
         Lifetime stats and match list
     """
-    try:
-        endpoint = f"/valorant/v1/lifetime/matches/{region}/{name}/{tag}"
-        params = {
-            "mode": mode,
-            "map": map_filter,
-            "page": page,
-            "size": size
-        }
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        response = make_api_request(endpoint, params)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        matches = data.get("matches", [])
-        
-        return {
-            "player_name": f"{name}#{tag}",
-            "region": region,
-            "lifetime_stats": {
-                "total_matches": data.get("total_matches"),
-                "win_rate": data.get("win_rate"),
-                "average_score": data.get("average_score"),
-                "favorite_agent": data.get("favorite_agent"),
-                "favorite_map": data.get("favorite_map")
-            },
-            "matches": [
-                {
-                    "match_id": match.get("match_id"),
-                    "map": match.get("map"),
-                    "mode": match.get("mode"),
-                    "result": match.get("result"),
-                    "score": match.get("score"),
-                    "date": match.get("date")
-                } for match in matches
-            ],
-            "total_matches": len(matches)
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    region = region.lower()
+    error = _validate_args(region)
+    if error:
+        return error
+    
+    endpoint = f"/valorant/v1/lifetime/matches/{region}/{_riot_id_path(name, tag)}"
+    params = {
+        "mode": mode,
+        "map": map_filter,
+        "page": page,
+        "size": size
+    }
+    params = {k: v for k, v in params.items() if v is not None}
+    
+    response = await make_api_request(endpoint, params)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    matches = data.get("matches", [])
+    
+    return {
+        "player_name": f"{name}#{tag}",
+        "region": region,
+        "lifetime_stats": {
+            "total_matches": data.get("total_matches"),
+            "win_rate": data.get("win_rate"),
+            "average_score": data.get("average_score"),
+            "favorite_agent": data.get("favorite_agent"),
+            "favorite_map": data.get("favorite_map")
+        },
+        "matches": [
+            {
+                "match_id": match.get("match_id"),
+                "map": match.get("map"),
+                "mode": match.get("mode"),
+                "result": match.get("result"),
+                "score": match.get("score"),
+                "date": match.get("date")
+            } for match in matches
+        ],
+        "total_matches": len(matches)
+    }
 
 @mcp.tool()
 async def get_leaderboard(region: str = "na", season: str = "e8a1") -> Dict[str, Any]:
@@ -425,40 +731,30 @@ async def get_leaderboard(region: str = "na", season: str = "e8a1") -> Dict[str,
     Returns:
         List of top players with rankings and ratings
     """
-    try:
-        endpoint = f"/valorant/v2/leaderboard/{region}"
-        params = {"season": season}
-        response = make_api_request(endpoint, params)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        players = data.get("players", [])
-        
-        player_list = []
-        for player in players:
-            player_info = {
-                "puuid": player.get("puuid"),
-                "game_name": player.get("game_name"),
-                "tag_line": player.get("tag_line"),
-                "leaderboard_rank": player.get("leaderboard_rank"),
-                "ranked_rating": player.get("ranked_rating"),
-                "number_of_wins": player.get("number_of_wins"),
-                "competitive_tier": player.get("competitive_tier")
-            }
-            player_list.append(player_info)
-        
-        return {
-            "region": region,
-            "season": season,
-            "players": player_list,
-            "total_players": len(player_list),
-            "last_update": data.get("last_update")
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    region = region.lower()
+    error = _validate_args(region)
+    if error:
+        return error
+    
+    endpoint = f"/valorant/v2/leaderboard/{region}"
+    params = {"season": season}
+    response = await cached_api_request(_leaderboard_cache, endpoint, params)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    players = data.get("players", [])
+    
+    player_list = [LeaderboardEntry(**_project(player, _LEADERBOARD_PLAYER_KEYS)) for player in players]
+    
+    return {
+        "region": region,
+        "season": season,
+        "players": player_list,
+        "total_players": len(player_list),
+        "last_update": data.get("last_update")
+    }
 
 @mcp.tool()
 async def get_content(region: str = "na") -> Dict[str, Any]:
@@ -473,43 +769,24 @@ async def get_content(region: str = "na") -> Dict[str, Any]:
     Returns:
         All agents, maps, and game content
     """
-    try:
-        endpoint = "/valorant/v1/content"
-        response = make_api_request(endpoint)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        
-        return {
-            "version": data.get("version"),
-            "characters": [
-                {
-                    "uuid": char.get("uuid"),
-                    "display_name": char.get("display_name"),
-                    "description": char.get("description"),
-                    "display_icon": char.get("display_icon"),
-                    "role": {
-                        "uuid": char.get("role", {}).get("uuid"),
-                        "display_name": char.get("role", {}).get("display_name"),
-                        "description": char.get("role", {}).get("description"),
-                        "display_icon": char.get("role", {}).get("display_icon")
-                    } if char.get("role") else None
-                } for char in data.get("characters", [])
-            ],
-            "maps": [
-                {
-                    "uuid": map_info.get("uuid"),
-                    "display_name": map_info.get("display_name"),
-                    "coordinates": map_info.get("coordinates"),
-                    "display_icon": map_info.get("display_icon")
-                } for map_info in data.get("maps", [])
-            ]
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    endpoint = "/valorant/v1/content"
+    response = await cached_api_request(_content_cache, endpoint)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    
+    return {
+        "version": data.get("version"),
+        "characters": [
+            {
+                **_project(char, _CONTENT_ENTITY_KEYS),
+                "role": _project(role, _CONTENT_ENTITY_KEYS) if (role := char.get("role")) else None
+            } for char in data.get("characters", [])
+        ],
+        "maps": [_project(map_info, _MAP_KEYS) for map_info in data.get("maps", [])]
+    }
 
 @mcp.tool()
 async def get_status(region: str = "na") -> Dict[str, Any]:
@@ -524,23 +801,19 @@ async def get_status(region: str = "na") -> Dict[str, Any]:
     Returns:
         Service status, maintenance windows, incidents
     """
-    try:
-        endpoint = "/valorant/v1/status"
-        response = make_api_request(endpoint)
-        
-        if "error" in response:
-            return response
-        
-        data = response.get("data", {})
-        
-        return {
-            "region": region,
-            "maintenances": data.get("maintenances", []),
-            "incidents": data.get("incidents", [])
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    endpoint = "/valorant/v1/status"
+    response = await cached_api_request(_status_cache, endpoint)
+    
+    if "error" in response:
+        return response
+    
+    data = response.get("data") or _EMPTY
+    
+    return {
+        "region": region,
+        "maintenances": data.get("maintenances", []),
+        "incidents": data.get("incidents", [])
+    }
 
 @mcp.tool()
 async def set_api_key(api_key_input: str) -> Dict[str, Any]:
@@ -556,176 +829,357 @@ async def set_api_key(api_key_input: str) -> Dict[str, Any]:
         Confirmation message
     """
     global api_key
-    try:
-        api_key = api_key_input
-        return {"message": "API key set successfully", "status": "success"}
-    except Exception as e:
-        logger.error(f"Error setting API key: {e}")
-        return {"error": f"Failed to set API key: {str(e)}"}
+    api_key = api_key_input
+    return {"message": "API key set successfully", "status": "success"}
 
 # ============================================================================
-# ADVANCED TOOLS (2 tools)
+# ADVANCED TOOLS (4 tools)
 # ============================================================================
 
+# Optional sections of the competitive analysis response; the Literal lets
+# FastMCP advertise and validate the allowed names in the tool schema
+AnalysisSection = Literal["matches", "overall", "agents", "maps"]
+_ANALYSIS_SECTIONS = frozenset(get_args(AnalysisSection))
+MAX_BATCH_PLAYERS = 10
+# Requests a batch analysis may make (MMR histories plus uncached matches),
+# capped at one minute of the rate limiter's budget so a call finishes well
+# inside client timeouts
+MAX_BATCH_REQUESTS = RATE_LIMIT_PER_MINUTE
+
+def _round2(value: float) -> float:
+    """Round a ratio to 2 decimals for display"""
+    return round(value, 2)
+
+async def _fetch_mmr_history(name: str, tag: str, region: str, size: int) -> Dict[str, Any]:
+    """Fetch a player's MMR history, which carries the match IDs the analysis reads"""
+    endpoint = f"/valorant/v1/mmr-history/{region}/{_riot_id_path(name, tag)}"
+    return await make_api_request(endpoint, {"size": size})
+
+@mcp.tool()
+async def get_match_details_batch(match_ids: List[str], region: str = "na") -> Dict[str, Any]:
+    """
+    Get detailed information about several matches in one call.
+    
+    Fetches all matches concurrently instead of one tool call per match.
+    
+    Args:
+        match_ids: Match identifiers (max: 20)
+        region: Region code (ap, na, eu, kr, br, latam)
+    
+    Returns:
+        Match details in the same order as match_ids; failed matches hold an error
+    """
+    if len(match_ids) > MAX_PAGE_SIZE:
+        return {"error": f"Too many match IDs: {len(match_ids)}. Maximum is {MAX_PAGE_SIZE}"}
+    
+    results = await asyncio.gather(*(fetch_match_details(m) for m in match_ids), return_exceptions=True)
+    matches = [
+        {"match_id": match_id, "error": f"Unexpected error: {str(result)}"} if isinstance(result, Exception) else result
+        for match_id, result in zip(match_ids, results)
+    ]
+    
+    return {
+        "matches": matches,
+        "total_matches": len(matches)
+    }
+
+def _analysis_sections(include: Optional[List[AnalysisSection]]) -> Tuple[frozenset, Optional[Dict[str, Any]]]:
+    """Resolve the include argument to a set of sections, or an error dict if it names none"""
+    if include is None:
+        return _ANALYSIS_SECTIONS, None
+    # Every section is built from match details, so an empty list would spend
+    # the match requests only to return current_rank
+    if not include:
+        return frozenset(), {"error": f"include must name at least one of: {', '.join(sorted(_ANALYSIS_SECTIONS))}"}
+    return frozenset(include), None
+
+async def analyze_competitive_matches(
+    name: str,
+    tag: str,
+    mmr_response: Dict[str, Any],
+    match_count: int,
+    sections: frozenset,
+    ctx: Optional[Context] = None
+) -> Dict[str, Any]:
+    """Build the competitive analysis for one player from their MMR history; shared by the single and batch analysis tools"""
+    want_matches = "matches" in sections
+    want_agents = "agents" in sections
+    want_maps = "maps" in sections
+    
+    if "error" in mmr_response:
+        return mmr_response
+    
+    mmr_data = mmr_response.get("data", [])
+    
+    if not mmr_data:
+        return {
+            "player": f"{name}#{tag}",
+            "message": "No competitive match history found."
+        }
+    
+    # MMR history carries no PUUID. Use a cached one if known; otherwise the
+    # player is identified in each match by Riot ID, saving the account request
+    puuid = _cached_puuid(name, tag)
+    
+    # Fetch detailed match data for each competitive match
+    detailed_matches = []
+    total_kills = 0
+    total_deaths = 0
+    total_assists = 0
+    total_score = 0
+    matches_analyzed = 0
+    wins = 0
+    agent_stats = defaultdict(lambda: {"matches": 0, "kills": 0, "deaths": 0, "assists": 0, "score": 0})
+    map_stats = defaultdict(lambda: {"matches": 0, "kills": 0, "deaths": 0, "mmr_change": 0})
+    
+    # Fetch all matches concurrently; the shared semaphore bounds the fan-out
+    match_entries = [entry for entry in mmr_data[:match_count] if entry.get("match_id")]
+    
+    async def fetch_match(index: int, match_id: str) -> Tuple[int, Dict[str, Any]]:
+        return index, await _fetch_match(match_id)
+    
+    # Report progress as each match arrives so clients see the fan-out advance;
+    # results are still aggregated in MMR-history order below
+    match_responses: List[Dict[str, Any]] = [_EMPTY] * len(match_entries)
+    pending = [fetch_match(i, entry["match_id"]) for i, entry in enumerate(match_entries)]
+    for done, next_match in enumerate(asyncio.as_completed(pending), 1):
+        index, match_responses[index] = await next_match
+        if ctx is not None:
+            await ctx.report_progress(done, len(match_entries), f"Fetched {done}/{len(match_entries)} matches")
+    
+    for mmr_entry, match_response in zip(match_entries, match_responses):
+        if "error" in match_response:
+            continue
+        
+        match_id = mmr_entry["match_id"]
+        match_data = match_response.get("data") or _EMPTY
+        all_players = (match_data.get("players") or _EMPTY).get("all_players", [])
+        
+        player_data = _find_player(all_players, puuid, name, tag)
+        
+        if player_data:
+            if not puuid and player_data.get("puuid"):
+                puuid = player_data["puuid"]
+                _remember_puuid(name, tag, puuid)
+            
+            stats = player_data.get("stats") or _EMPTY
+            kills = stats.get("kills", 0)
+            deaths = stats.get("deaths", 0)
+            assists = stats.get("assists", 0)
+            score = stats.get("score", 0)
+            agent = player_data.get("character", "Unknown")
+            
+            mmr_change = mmr_entry.get("mmr_change_to_last_game", 0)
+            map_info = mmr_entry.get("map") or _EMPTY
+            map_name = map_info.get("name") if isinstance(map_info, dict) else "Unknown"
+            won = mmr_change > 0
+            
+            if want_agents:
+                agent_totals = agent_stats[agent]
+                agent_totals["matches"] += 1
+                agent_totals["kills"] += kills
+                agent_totals["deaths"] += deaths
+                agent_totals["assists"] += assists
+                agent_totals["score"] += score
+            
+            if want_maps:
+                map_totals = map_stats[map_name]
+                map_totals["matches"] += 1
+                map_totals["kills"] += kills
+                map_totals["deaths"] += deaths
+                map_totals["mmr_change"] += mmr_change
+            
+            if want_matches:
+                detailed_matches.append({
+                    "match_id": match_id,
+                    "map": map_name,
+                    "agent": agent,
+                    "kills": kills,
+                    "deaths": deaths,
+                    "assists": assists,
+                    "kda": _round2((kills + assists) / max(deaths, 1)),
+                    "score": score,
+                    "mmr_change": mmr_change,
+                    "rank": mmr_entry.get("currenttierpatched"),
+                    "rr": mmr_entry.get("ranking_in_tier"),
+                    "elo": mmr_entry.get("elo"),
+                    "date": mmr_entry.get("date"),
+                    "result": "Win" if won else "Loss"
+                })
+            
+            matches_analyzed += 1
+            total_kills += kills
+            total_deaths += deaths
+            total_assists += assists
+            total_score += score
+            if won:
+                wins += 1
+    
+    result = {"player": f"{name}#{tag}"}
+    
+    if want_matches:
+        result["competitive_matches"] = detailed_matches
+    
+    if "overall" in sections:
+        # All totals are 0 when nothing was analyzed, so dividing by 1 yields 0
+        divisor = matches_analyzed or 1
+        result["overall_stats"] = {
+            "matches": matches_analyzed,
+            "avg_kills": _round2(total_kills / divisor),
+            "avg_deaths": _round2(total_deaths / divisor),
+            "avg_assists": _round2(total_assists / divisor),
+            "avg_score": _round2(total_score / divisor),
+            "kd_ratio": _round2(total_kills / max(total_deaths, 1)),
+            "win_rate": _round2(wins * 100 / divisor)
+        }
+    
+    if want_agents:
+        # Every tallied agent has at least one match, so averages are computed unconditionally
+        for stats in agent_stats.values():
+            matches = stats["matches"]
+            stats["avg_kills"] = _round2(stats["kills"] / matches)
+            stats["avg_deaths"] = _round2(stats["deaths"] / matches)
+            stats["kd_ratio"] = _round2(stats["kills"] / max(stats["deaths"], 1))
+        
+        best_agents = sorted(agent_stats.items(), key=lambda x: x[1].get("kd_ratio", 0), reverse=True)
+        result["agent_performance"] = dict(best_agents)
+    
+    if want_maps:
+        result["map_performance"] = dict(map_stats)
+    
+    result["current_rank"] = {
+        "rank": mmr_data[0].get("currenttierpatched") if mmr_data else None,
+        "elo": mmr_data[0].get("elo") if mmr_data else None,
+        "rr": mmr_data[0].get("ranking_in_tier") if mmr_data else None
+    }
+    return result
+
 @mcp.tool()
 async def get_detailed_competitive_analysis(
     name: str,
     tag: str,
     region: str = "na",
-    match_count: int = 10
+    match_count: int = 10,
+    include: Optional[List[AnalysisSection]] = None,
+    ctx: Optional[Context] = None
 ) -> Dict[str, Any]:
     """
     Get comprehensive competitive analysis by combining MMR history + match details.
     
     This is the most powerful tool for competitive insights.
     Combines two different API endpoints to correlate performance with MMR changes.
+    Reports progress as match details arrive.
     
     Args:
         name: Player's in-game name
         tag: Player's tag
         region: Region code (ap, na, eu, kr, br, latam)
         match_count: Number of matches to analyze (default: 10, max: 20)
+        include: Sections to return, at least one of matches, overall, agents, maps; default all
     
     Returns:
         Detailed competitive matches with performance + MMR correlation
     """
-    try:
-        # Get MMR history (has match IDs!)
-        mmr_history_endpoint = f"/valorant/v1/mmr-history/{region}/{name}/{tag}"
-        mmr_response = make_api_request(mmr_history_endpoint, {"size": match_count})
-        
-        if "error" in mmr_response:
-            return mmr_response
-        
-        mmr_data = mmr_response.get("data", [])
-        
-        if not mmr_data:
-            return {
-                "player": f"{name}#{tag}",
-                "message": "No competitive match history found."
-            }
-        
-        # Get PUUID
-        account_endpoint = f"/valorant/v1/account/{name}/{tag}"
-        account_response = make_api_request(account_endpoint)
-        
-        if "error" in account_response:
-            return account_response
-        
-        puuid = account_response.get("data", {}).get("puuid")
-        
-        # Fetch detailed match data for each competitive match
-        detailed_matches = []
-        total_kills = 0
-        total_deaths = 0
-        total_assists = 0
-        total_score = 0
-        agent_stats = {}
-        map_stats = {}
-        
-        for mmr_entry in mmr_data[:match_count]:
-            match_id = mmr_entry.get("match_id")
-            if not match_id:
-                continue
-            
-            match_endpoint = f"/valorant/v2/match/{match_id}"
-            match_response = make_api_request(match_endpoint)
-            
-            if "error" not in match_response:
-                match_data = match_response.get("data", {})
-                players = match_data.get("players", {})
-                all_players = players.get("all_players", [])
-                
-                player_data = None
-                for p in all_players:
-                    if p.get("puuid") == puuid:
-                        player_data = p
-                        break
-                
-                if player_data:
-                    stats = player_data.get("stats", {})
-                    kills = stats.get("kills", 0)
-                    deaths = stats.get("deaths", 0)
-                    assists = stats.get("assists", 0)
-                    score = stats.get("score", 0)
-                    agent = player_data.get("character", "Unknown")
-                    
-                    map_info = mmr_entry.get("map", {})
-                    map_name = map_info.get("name") if isinstance(map_info, dict) else "Unknown"
-                    
-                    if agent not in agent_stats:
-                        agent_stats[agent] = {"matches": 0, "kills": 0, "deaths": 0, "assists": 0, "score": 0}
-                    agent_stats[agent]["matches"] += 1
-                    agent_stats[agent]["kills"] += kills
-                    agent_stats[agent]["deaths"] += deaths
-                    agent_stats[agent]["assists"] += assists
-                    agent_stats[agent]["score"] += score
-                    
-                    if map_name not in map_stats:
-                        map_stats[map_name] = {"matches": 0, "kills": 0, "deaths": 0, "mmr_change": 0}
-                    map_stats[map_name]["matches"] += 1
-                    map_stats[map_name]["kills"] += kills
-                    map_stats[map_name]["deaths"] += deaths
-                    map_stats[map_name]["mmr_change"] += mmr_entry.get("mmr_change_to_last_game", 0)
-                    
-                    detailed_matches.append({
-                        "match_id": match_id,
-                        "map": map_name,
-                        "agent": agent,
-                        "kills": kills,
-                        "deaths": deaths,
-                        "assists": assists,
-                        "kda": round((kills + assists) / max(deaths, 1), 2),
-                        "score": score,
-                        "mmr_change": mmr_entry.get("mmr_change_to_last_game", 0),
-                        "rank": mmr_entry.get("currenttierpatched"),
-                        "rr": mmr_entry.get("ranking_in_tier"),
-                        "elo": mmr_entry.get("elo"),
-                        "date": mmr_entry.get("date"),
-                        "result": "Win" if mmr_entry.get("mmr_change_to_last_game", 0) > 0 else "Loss"
-                    })
-                    
-                    total_kills += kills
-                    total_deaths += deaths
-                    total_assists += assists
-                    total_score += score
-        
-        matches_analyzed = len(detailed_matches)
-        overall_stats = {
-            "matches": matches_analyzed,
-            "avg_kills": round(total_kills / matches_analyzed, 2) if matches_analyzed > 0 else 0,
-            "avg_deaths": round(total_deaths / matches_analyzed, 2) if matches_analyzed > 0 else 0,
-            "avg_assists": round(total_assists / matches_analyzed, 2) if matches_analyzed > 0 else 0,
-            "avg_score": round(total_score / matches_analyzed, 2) if matches_analyzed > 0 else 0,
-            "kd_ratio": round(total_kills / max(total_deaths, 1), 2),
-            "win_rate": round((len([m for m in detailed_matches if m["result"] == "Win"]) / matches_analyzed * 100), 2) if matches_analyzed > 0 else 0
-        }
-        
-        for agent, stats in agent_stats.items():
-            matches = stats["matches"]
-            if matches > 0:
-                stats["avg_kills"] = round(stats["kills"] / matches, 2)
-                stats["avg_deaths"] = round(stats["deaths"] / matches, 2)
-                stats["kd_ratio"] = round(stats["kills"] / max(stats["deaths"], 1), 2)
-        
-        best_agents = sorted(agent_stats.items(), key=lambda x: x[1].get("kd_ratio", 0), reverse=True)
-        
+    region = region.lower()
+    error = _validate_args(region, match_count)
+    if error:
+        return error
+    
+    sections, error = _analysis_sections(include)
+    if error:
+        return error
+    
+    mmr_response = await _fetch_mmr_history(name, tag, region, match_count)
+    return await analyze_competitive_matches(name, tag, mmr_response, match_count, sections, ctx)
+
+@mcp.tool()
+async def get_competitive_analysis_batch(
+    players: List[Dict[str, str]],
+    region: str = "na",
+    match_count: int = 10,
+    include: Optional[List[AnalysisSection]] = None
+) -> Dict[str, Any]:
+    """
+    Get competitive analyses for several players in one call.
+    
+    Runs all players' analyses concurrently. Matches shared by teammates
+    are fetched once and reused across their analyses.
+    
+    A batch may make at most 30 requests: one MMR history per player plus
+    each distinct match not already cached. MMR histories are fetched first
+    to count the matches; a batch over the limit is then rejected before
+    any match is fetched. A 5-stack sharing its last 10 matches needs 15.
+    
+    Args:
+        players: Players to analyze, each as {"name": ..., "tag": ...} (max: 10);
+            duplicate Riot IDs are analyzed once
+        region: Region code (ap, na, eu, kr, br, latam)
+        match_count: Number of matches to analyze per player (default: 10, max: 20)
+        include: Sections to return, at least one of matches, overall, agents, maps; default all
+    
+    Returns:
+        One analysis per distinct player, in the order first given
+    """
+    region = region.lower()
+    error = _validate_args(region, match_count)
+    if error:
+        return error
+    
+    sections, error = _analysis_sections(include)
+    if error:
+        return error
+    
+    if not all(p.get("name") and p.get("tag") for p in players):
+        return {"error": "Each player needs a name and a tag"}
+    
+    # Riot IDs are case-insensitive; analyze each player once, keeping the first spelling
+    unique_players = {}
+    for p in players:
+        unique_players.setdefault((p["name"].lower(), p["tag"].lower()), p)
+    players = list(unique_players.values())
+    if len(players) > MAX_BATCH_PLAYERS:
+        return {"error": f"Too many players: {len(players)}. Maximum is {MAX_BATCH_PLAYERS}"}
+    
+    histories = await asyncio.gather(
+        *(_fetch_mmr_history(p["name"], p["tag"], region, match_count) for p in players),
+        return_exceptions=True
+    )
+    histories = [
+        {"error": f"Unexpected error: {str(history)}"} if isinstance(history, Exception) else history
+        for history in histories
+    ]
+    
+    # Budget the requests actually needed: matches shared by teammates or
+    # already cached cost nothing extra
+    match_ids = set()
+    for history in histories:
+        if "error" not in history:
+            match_ids.update(entry["match_id"] for entry in (history.get("data") or [])[:match_count] if entry.get("match_id"))
+    request_count = len(players) + sum(1 for match_id in match_ids if not _match_is_cached(match_id))
+    if request_count > MAX_BATCH_REQUESTS:
         return {
-            "player": f"{name}#{tag}",
-            "competitive_matches": detailed_matches,
-            "overall_stats": overall_stats,
-            "agent_performance": dict(best_agents),
-            "map_performance": map_stats,
-            "current_rank": {
-                "rank": mmr_data[0].get("currenttierpatched") if mmr_data else None,
-                "elo": mmr_data[0].get("elo") if mmr_data else None,
-                "rr": mmr_data[0].get("ranking_in_tier") if mmr_data else None
-            }
+            "error": f"Batch too large: needs {request_count} requests ({len(players)} MMR histories plus "
+                     f"{request_count - len(players)} uncached matches). Maximum is {MAX_BATCH_REQUESTS}; "
+                     f"reduce players or match_count"
         }
-        
-    except Exception as e:
-        logger.error(f"Error in detailed competitive analysis: {e}")
-        return {"error": f"Failed to get detailed competitive analysis: {str(e)}"}
+    
+    # Concurrent misses for the same match share one fetch through the match cache
+    results = await asyncio.gather(
+        *(
+            analyze_competitive_matches(p["name"], p["tag"], history, match_count, sections)
+            for p, history in zip(players, histories)
+        ),
+        return_exceptions=True
+    )
+    analyses = [
+        {"player": f"{p['name']}#{p['tag']}", "error": f"Unexpected error: {str(result)}"} if isinstance(result, Exception) else result
+        for p, result in zip(players, results)
+    ]
+    
+    return {
+        "analyses": analyses,
+        "total_players": len(analyses)
+    }
 
 @mcp.tool()
 async def find_leaderboard_position(
@@ -749,77 +1203,86 @@ async def find_leaderboard_position(
     Returns:
         Leaderboard position, rank, nearby players
     """
-    try:
-        leaderboard_endpoint = f"/valorant/v2/leaderboard/{region}"
-        leaderboard_response = make_api_request(leaderboard_endpoint, {"season": season})
-        
-        if "error" in leaderboard_response:
-            return leaderboard_response
+    region = region.lower()
+    error = _validate_args(region)
+    if error:
+        return error
+    
+    leaderboard_endpoint = f"/valorant/v2/leaderboard/{region}"
+    leaderboard_params = {"season": season}
+    mmr_endpoint = f"/valorant/v2/mmr/{region}/{_riot_id_path(name, tag)}"
+    
+    # On a cached leaderboard the MMR fallback is only requested if the player
+    # is missing. On a miss, most players are not on the leaderboard and need
+    # the fallback, so fetch it alongside the leaderboard instead of after
+    mmr_response = None
+    leaderboard_response = _leaderboard_cache.get(_cache_key(leaderboard_endpoint, leaderboard_params))
+    if leaderboard_response is None:
+        leaderboard_response, mmr_response = await asyncio.gather(
+            cached_api_request(_leaderboard_cache, leaderboard_endpoint, leaderboard_params),
+            make_api_request(mmr_endpoint)
+        )
+    
+    if "error" in leaderboard_response:
+        return leaderboard_response
+    
+    leaderboard_data = leaderboard_response.get("data") or _EMPTY
+    players = leaderboard_data.get("players", [])
+    
+    # Riot IDs are case-insensitive, so match on lower-cased name and tag
+    index = _leaderboard_index((region, season), players)
+    player_index = index.get((name.lower(), tag.lower()), -1)
+    player_found = players[player_index] if player_index >= 0 else None
+    
+    if player_found:
+        nearby_players = []
+        start_idx = max(0, player_index - 2)
+        end_idx = min(len(players), player_index + 3)
         
-        leaderboard_data = leaderboard_response.get("data", {})
-        players = leaderboard_data.get("players", [])
+        for i in range(start_idx, end_idx):
+            if i != player_index:
+                nearby_players.append({
+                    "rank": players[i].get("leaderboard_rank"),
+                    "name": f"{players[i].get('game_name')}#{players[i].get('tag_line')}",
+                    "rr": players[i].get("ranked_rating"),
+                    "wins": players[i].get("number_of_wins")
+                })
         
-        player_found = None
-        player_index = -1
+        return {
+            "found": True,
+            "player": f"{name}#{tag}",
+            "position": player_found.get("leaderboard_rank"),
+            "ranked_rating": player_found.get("ranked_rating"),
+            "wins": player_found.get("number_of_wins"),
+            "competitive_tier": player_found.get("competitive_tier"),
+            "nearby_players": nearby_players,
+            "total_leaderboard_players": len(players)
+        }
+    else:
+        if mmr_response is None:
+            mmr_response = await make_api_request(mmr_endpoint)
+        mmr_data = mmr_response.get("data") or _EMPTY
         
-        for i, player in enumerate(players):
-            if player.get("game_name") == name and player.get("tag_line") == tag:
-                player_found = player
-                player_index = i
-                break
+        lowest_lb_player = players[-1] if players else None
         
-        if player_found:
-            nearby_players = []
-            start_idx = max(0, player_index - 2)
-            end_idx = min(len(players), player_index + 3)
-            
-            for i in range(start_idx, end_idx):
-                if i != player_index:
-                    nearby_players.append({
-                        "rank": players[i].get("leaderboard_rank"),
-                        "name": f"{players[i].get('game_name')}#{players[i].get('tag_line')}",
-                        "rr": players[i].get("ranked_rating"),
-                        "wins": players[i].get("number_of_wins")
-                    })
-            
-            return {
-                "found": True,
-                "player": f"{name}#{tag}",
-                "position": player_found.get("leaderboard_rank"),
-                "ranked_rating": player_found.get("ranked_rating"),
-                "wins": player_found.get("number_of_wins"),
-                "competitive_tier": player_found.get("competitive_tier"),
-                "nearby_players": nearby_players,
-                "total_leaderboard_players": len(players)
-            }
-        else:
-            mmr_endpoint = f"/valorant/v2/mmr/{region}/{name}/{tag}"
-            mmr_response = make_api_request(mmr_endpoint)
-            mmr_data = mmr_response.get("data", {})
-            
-            lowest_lb_player = players[-1] if players else None
-            
-            return {
-                "found": False,
-                "player": f"{name}#{tag}",
-                "message": "Player not found on leaderboard",
-                "current_rank": mmr_data.get("current_tier_patched"),
-                "current_elo": mmr_data.get("elo"),
-                "leaderboard_info": {
-                    "minimum_rank_required": "Immortal 3+",
-                    "total_players_on_leaderboard": len(players),
-                    "lowest_leaderboard_rr": lowest_lb_player.get("ranked_rating") if lowest_lb_player else None
-                }
+        return {
+            "found": False,
+            "player": f"{name}#{tag}",
+            "message": "Player not found on leaderboard",
+            "current_rank": mmr_data.get("current_tier_patched"),
+            "current_elo": mmr_data.get("elo"),
+            "leaderboard_info": {
+                "minimum_rank_required": "Immortal 3+",
+                "total_players_on_leaderboard": len(players),
+                "lowest_leaderboard_rr": lowest_lb_player.get("ranked_rating") if lowest_lb_player else None
             }
-        
-    except Exception as e:
-        logger.error(f"Error finding leaderboard position: {e}")
-        return {"error": f"Failed to find leaderboard position: {str(e)}"}
+        }
 
 def main():
     """Main function to run the MCP server"""
     global api_key
-    # Load environment variables from a .env file if present
+    # Load environment variables from a .env file if present (only needed at startup)
+    from dotenv import load_dotenv
     load_dotenv()
     # Allow overriding log level from environment
     log_level_name = os.getenv("LOG_LEVEL", "INFO").upper()